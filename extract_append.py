@@ -3,94 +3,229 @@
 Extract follower data from cached HTML files and append to JSON history file.
 """
 
-import re
+import os
 import json
+import mmap
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional
 
+# Prefer RE2 (linear-time, no backtracking) when installed; the patterns below
+# stick to the syntax both engines support.
+try:
+    import re2 as re
+except ImportError:
+    import re
+
+# orjson is a much faster drop-in for the history file; fall back to json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Needed only to read compressed (.html.zst) cache files
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+
+# Extractor patterns are bytes so they can run directly over mmap'd HTML files
+# without decoding them to str first. Bilibili and Douyin patterns start with a
+# rare literal rather than a generic '<span'/'<div', so the engine can jump
+# straight to candidate offsets instead of trying every tag.
+_BILI_RE = re.compile(r'class="nav-statistics__item-text">粉丝数</span><span[^>]*class="nav-statistics__item-num"[^>]*title="(\d+)">\d+</span>'.encode('utf-8'))
+# Match the exact label/value div pair instead of lazy DOTALL spans, which
+# backtrack across the whole document on long pages.
+_DOUYIN_RE = re.compile(r'data-e2e="user-info-fans"[^>]*>\s*<div[^>]*>粉丝</div>\s*<div[^>]*>(\d+)</div>'.encode('utf-8'))
+_XHS_RE = re.compile(r'<span class="count"[^>]*>(\d+)</span><span class="shows"[^>]*>粉丝</span>'.encode('utf-8'))
+_TS_RE = re.compile(r'(\d{8})_(\d{6})')
+
+PLATFORMS = ('bilibili', 'douyin', 'xiaohongshu')
+
+# Literal markers located with find() before running the patterns above
+_BILI_ANCHOR = '粉丝数</span>'.encode('utf-8')
+_DOUYIN_ANCHOR = b'data-e2e="user-info-fans"'
+_XHS_ANCHOR = '>粉丝</span>'.encode('utf-8')
+_WINDOW = 512
+
+# Below this many files a process pool costs more to start than it saves
+_PARALLEL_MIN_FILES = 8
+# Importing numba alone takes ~0.4s, so the JIT digit scan is only worth it for large batches
+_JIT_MIN_FILES = 1000
+
+
+def _search_near(pattern, html_content: bytes, anchor: bytes, before: int = 0, after: int = _WINDOW):
+    """
+    Search for pattern only in a small window around each occurrence of anchor.
+    find() is much cheaper than the regex, so the compound pattern never has to
+    scan the whole document.
+    """
+    i = html_content.find(anchor)
+    while i >= 0:
+        match = pattern.search(html_content, max(i - before, 0), i + len(anchor) + after)
+        if match:
+            return match
+        i = html_content.find(anchor, i + 1)
+    return None
+
+
+def _parse_uint(buf: bytes, start: int, end: int) -> int:
+    """
+    Parse the ASCII digits in buf[start:end]. Works on bytes and mmap buffers alike.
+    Replaced by a numba-compiled _scan_uint for large batches, see _enable_jit_parse.
+    """
+    return int(buf[start:end])
+
+
+def _scan_uint(buf: bytes, start: int, end: int) -> int:
+    """
+    Parse the ASCII digits in buf[start:end] in place, without slicing out a
+    bytes object. Only used once compiled by numba.
+    """
+    n = 0
+    for i in range(start, end):
+        n = n * 10 + (buf[i] - 48)
+    return n
+
+
+def _enable_jit_parse() -> bool:
+    """
+    Swap _parse_uint for the numba-compiled _scan_uint if numba is installed.
+    numba is imported here rather than at module load so small runs never pay for it.
+    """
+    global _parse_uint
+    try:
+        from numba import njit
+    except ImportError:
+        return False
+    _parse_uint = njit(cache=True)(_scan_uint)
+    return True
+
 
 class DataExtractor:
     def __init__(self, html_cache_dir: str = 'html_cache', output_file: str = 'follower_history.json'):
         self.html_cache_dir = Path(html_cache_dir)
         self.output_file = Path(output_file)
+        # Parsed history, shared by every load_existing_data call on this instance
+        self._history_cache = None
         
-    def extract_bilibili_followers(self, html_content: str) -> Optional[int]:
+    @staticmethod
+    def extract_bilibili_followers(html_content: bytes) -> Optional[int]:
         """
         Extract Bilibili follower count from HTML.
         Pattern: <span data-v-8c500df6="" class="nav-statistics__item-text">粉丝数</span><span data-v-8c500df6="" class="nav-statistics__item-num" title="532">532</span>
         """
-        pattern = r'<span[^>]*class="nav-statistics__item-text">粉丝数</span><span[^>]*class="nav-statistics__item-num"[^>]*title="(\d+)">(\d+)</span>'
-        match = re.search(pattern, html_content)
+        match = _search_near(_BILI_RE, html_content, _BILI_ANCHOR, before=64)
         if match:
             # Use the title attribute value as it's the raw number
-            return int(match.group(1))
+            return _parse_uint(html_content, *match.span(1))
         return None
     
-    def extract_douyin_followers(self, html_content: str) -> Optional[int]:
+    @staticmethod
+    def extract_douyin_followers(html_content: bytes) -> Optional[int]:
         """
         Extract Douyin follower count from HTML.
         Pattern: <div class="Q1A_pjwq ELUP9h2u" data-e2e="user-info-fans"><div class="uvGnYXqn">粉丝</div><div class="C1cxu0Vq">5439</div></div>
         """
-        pattern = r'<div[^>]*data-e2e="user-info-fans"[^>]*>.*?<div[^>]*>粉丝</div>.*?<div[^>]*>(\d+)</div>'
-        match = re.search(pattern, html_content, re.DOTALL)
+        match = _search_near(_DOUYIN_RE, html_content, _DOUYIN_ANCHOR)
         if match:
-            return int(match.group(1))
+            return _parse_uint(html_content, *match.span(1))
         return None
     
-    def extract_xiaohongshu_followers(self, html_content: str) -> Optional[int]:
+    @staticmethod
+    def extract_xiaohongshu_followers(html_content: bytes) -> Optional[int]:
         """
         Extract Xiaohongshu follower count from HTML.
         Pattern: <span class="count" data-v-18b45ae8="">1865</span><span class="shows" data-v-18b45ae8="">粉丝</span>
         """
-        pattern = r'<span class="count"[^>]*>(\d+)</span><span class="shows"[^>]*>粉丝</span>'
-        match = re.search(pattern, html_content)
+        # The count precedes the label, so the window extends backwards
+        match = _search_near(_XHS_RE, html_content, _XHS_ANCHOR, before=_WINDOW, after=0)
         if match:
-            return int(match.group(1))
+            return _parse_uint(html_content, *match.span(1))
         return None
     
-    def extract_timestamp_from_filename(self, filename: str) -> str:
+    @staticmethod
+    def extract_timestamp_from_filename(filename: str) -> str:
         """
         Extract timestamp from filename like 'bilibili_20251112_154753.html'
         Returns ISO format timestamp
         """
-        match = re.search(r'(\d{8})_(\d{6})', filename)
+        match = _TS_RE.search(filename)
         if match:
-            date_str = match.group(1)  # 20251112
-            time_str = match.group(2)  # 154753
-            # Parse to datetime
-            dt = datetime.strptime(f"{date_str}_{time_str}", "%Y%m%d_%H%M%S")
-            return dt.isoformat()
+            d = match.group(1)  # 20251112
+            t = match.group(2)  # 154753
+            # Fixed-width digits, so slice directly instead of going through strptime
+            return f"{d[0:4]}-{d[4:6]}-{d[6:8]}T{t[0:2]}:{t[2:4]}:{t[4:6]}"
         return datetime.now().isoformat()
     
-    def process_html_file(self, html_file: Path) -> Optional[Dict]:
+    @staticmethod
+    def extract_date_only_from_filename(filename: str) -> str:
+        """
+        Extract date from filename like 'bilibili_20251112_154753.html'
+        Returns YYYY-MM-DD
+        """
+        match = _TS_RE.search(filename)
+        if match:
+            d = match.group(1)
+            return f"{d[0:4]}-{d[4:6]}-{d[6:8]}"
+        return datetime.now().date().isoformat()
+    
+    @staticmethod
+    def extract_platform_from_filename(filename: str) -> Optional[str]:
+        """
+        Determine the platform from a filename like 'bilibili_20251112_154753.html'
+        """
+        filename = filename.lower()
+        for platform in PLATFORMS:
+            if platform in filename:
+                return platform
+        return None
+    
+    @staticmethod
+    def extract_followers(platform: Optional[str], html_content: bytes) -> Optional[int]:
+        """
+        Dispatch to the extractor for the given platform.
+        """
+        if platform == 'bilibili':
+            return DataExtractor.extract_bilibili_followers(html_content)
+        elif platform == 'douyin':
+            return DataExtractor.extract_douyin_followers(html_content)
+        elif platform == 'xiaohongshu':
+            return DataExtractor.extract_xiaohongshu_followers(html_content)
+        return None
+    
+    @staticmethod
+    def process_html_file(html_file: Path) -> Optional[Dict]:
         """
         Process a single HTML file and extract follower data.
+        Static so it can be shipped to worker processes without the extractor state.
         """
-        with open(html_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        platform = None
-        followers = None
-        
         # Determine platform from filename
         filename = html_file.name.lower()
-        if 'bilibili' in filename:
-            platform = 'bilibili'
-            followers = self.extract_bilibili_followers(html_content)
-        elif 'douyin' in filename:
-            platform = 'douyin'
-            followers = self.extract_douyin_followers(html_content)
-        elif 'xiaohongshu' in filename:
-            platform = 'xiaohongshu'
-            followers = self.extract_xiaohongshu_followers(html_content)
+        platform = DataExtractor.extract_platform_from_filename(filename)
+        
+        if filename.endswith('.zst'):
+            if zstd is None:
+                raise Exception(f"zstandard is required to read {html_file.name}")
+            # Decompress straight to bytes; the extractor patterns never need a str
+            with open(html_file, 'rb') as f:
+                html_content = zstd.ZstdDecompressor().decompress(f.read())
+            followers = DataExtractor.extract_followers(platform, html_content)
+        else:
+            # Search the file through a read-only mmap instead of reading it into a str
+            with open(html_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as html_content:
+                followers = DataExtractor.extract_followers(platform, html_content)
         
         if platform and followers is not None:
-            timestamp = self.extract_timestamp_from_filename(filename)
+            timestamp = DataExtractor.extract_timestamp_from_filename(filename)
+            date = DataExtractor.extract_date_only_from_filename(filename)
             return {
                 'platform': platform,
                 'followers': followers,
                 'timestamp': timestamp,
+                'date': date,
                 'source_file': html_file.name
             }
         else:
@@ -100,9 +235,21 @@ class DataExtractor:
     def load_existing_data(self) -> Dict:
         """
         Load existing follower history data.
+        The file is parsed once per instance; later calls return the cached history.
+        """
+        if self._history_cache is None:
+            self._history_cache = self._read_history_file()
+        return self._history_cache
+    
+    def _read_history_file(self) -> Dict:
+        """
+        Read and parse the follower history file from disk.
         """
         if self.output_file.exists():
             try:
+                if orjson is not None:
+                    with open(self.output_file, 'rb') as f:
+                        return orjson.loads(f.read())
                 with open(self.output_file, 'r', encoding='utf-8') as f:
                     return json.load(f)
             except Exception as e:
@@ -113,25 +260,30 @@ class DataExtractor:
     def save_data(self, data: Dict):
         """
         Save follower history data to JSON file.
+        Written to a temp file and renamed over the original, so a crash
+        mid-write never leaves a truncated history behind.
         """
-        with open(self.output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            content = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+        else:
+            content = json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+        
+        tmp_file = self.output_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_file, self.output_file)
+        self._history_cache = data
     
-    def append_data(self, new_entry: Dict):
+    def merge_entry(self, history: Dict, new_entry: Dict):
         """
-        Append new follower data to history grouped by date.
+        Merge new follower data into an in-memory history grouped by date.
         Structure: { "2025-11-12": { "douyin": 5439, "bilibili": 532, "xiaohongshu": 1865 } }
         """
-        # Load existing data
-        history = self.load_existing_data()
-        
         platform = new_entry['platform']
-        timestamp = new_entry['timestamp']
+        # Entries without a 'date' field (built by callers of append_data) fall back to the timestamp
+        date = new_entry.get('date') or new_entry['timestamp'].split('T')[0]
         followers = new_entry['followers']
         
-        # Extract date from timestamp (YYYY-MM-DD)
-        date = timestamp.split('T')[0]
-        
         # Initialize date entry if it doesn't exist
         if date not in history:
             history[date] = {}
@@ -141,10 +293,30 @@ class DataExtractor:
             print(f"⚠️  Data for {platform} on {date} already exists, overwriting")
         history[date][platform] = followers
         print(f"✓ Added {platform} data: {followers} followers on {date}")
-        
-        # Save updated history
+    
+    def append_data(self, new_entry: Dict):
+        """
+        Append a single entry to the history file (load, merge, save).
+        """
+        history = self.load_existing_data()
+        self.merge_entry(history, new_entry)
         self.save_data(history)
     
+    def _parse_html_files(self, html_files):
+        """
+        Yield (html_file, entry) pairs in file order. Small batches (the daily
+        cron run has at most three files) are parsed in-process; larger ones
+        are spread across a process pool.
+        """
+        if len(html_files) < _PARALLEL_MIN_FILES:
+            for html_file in html_files:
+                yield html_file, self.process_html_file(html_file)
+            return
+        
+        workers = min(len(html_files), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from zip(html_files, executor.map(self.process_html_file, html_files, chunksize=1))
+    
     def process_all_html_files(self):
         """
         Process all HTML files in the cache directory.
@@ -153,7 +325,8 @@ class DataExtractor:
             print(f"✗ HTML cache directory not found: {self.html_cache_dir}")
             return
         
-        html_files = list(self.html_cache_dir.glob('*.html'))
+        # Plain .html and zstd-compressed .html.zst cache files
+        html_files = list(self.html_cache_dir.glob('*.html')) + list(self.html_cache_dir.glob('*.html.zst'))
         
         if not html_files:
             print(f"⚠️  No HTML files found in {self.html_cache_dir}")
@@ -163,17 +336,51 @@ class DataExtractor:
         print(f"Processing {len(html_files)} HTML files...")
         print(f"{'='*50}\n")
         
-        processed = 0
+        # Load and save the history once for the whole batch
+        history = self.load_existing_data()
+        
+        # Skip files whose (date, platform) is already recorded before opening them.
+        # Only names that carry a timestamp qualify; otherwise the date would
+        # fall back to today and the file would be skipped unread.
+        seen = {(date, platform) for date, platforms in history.items() for platform in platforms}
+        pending = []
+        skipped = 0
         for html_file in sorted(html_files):
-            print(f"Processing: {html_file.name}")
-            entry = self.process_html_file(html_file)
-            if entry:
-                self.append_data(entry)
-                processed += 1
+            if not _TS_RE.search(html_file.name):
+                pending.append(html_file)
+                continue
+            platform = self.extract_platform_from_filename(html_file.name)
+            date = self.extract_date_only_from_filename(html_file.name)
+            if (date, platform) in seen:
+                print(f"Skipping: {html_file.name} ({platform} on {date} already recorded)")
+                skipped += 1
+                continue
+            pending.append(html_file)
+        if skipped:
             print()
+        html_files = pending
+        
+        # Enabled before the pool starts so forked workers inherit the compiled parser
+        if len(html_files) >= _JIT_MIN_FILES:
+            _enable_jit_parse()
+        
+        # Merge entries in file order; if a file fails, still save the ones
+        # merged before it
+        processed = 0
+        try:
+            for html_file, entry in self._parse_html_files(html_files):
+                print(f"Processing: {html_file.name}")
+                if entry:
+                    self.merge_entry(history, entry)
+                    processed += 1
+                print()
+        finally:
+            self.save_data(history)
         
         print(f"{'='*50}")
         print(f"✓ Processed {processed}/{len(html_files)} files successfully")
+        if skipped:
+            print(f"✓ Skipped {skipped} files already in history")
         print(f"✓ Data saved to: {self.output_file}")
         print(f"{'='*50}\n")
         
@@ -194,8 +401,12 @@ class DataExtractor:
         print("SUMMARY")
         print("="*50)
         
-        # Sort dates
-        sorted_dates = sorted(history.keys())
+        # Sort dates once and split the history into per-platform series
+        sorted_dates = sorted(history)
+        per_platform = {
+            platform: [(date, history[date][platform]) for date in sorted_dates if platform in history[date]]
+            for platform in PLATFORMS
+        }
         
         print(f"\nTotal dates recorded: {len(sorted_dates)}")
         print(f"Date range: {sorted_dates[0]} to {sorted_dates[-1]}")
@@ -205,19 +416,19 @@ class DataExtractor:
         for date in sorted_dates:
             print(f"\n  {date}:")
             platforms = history[date]
-            for platform, followers in sorted(platforms.items()):
-                print(f"    {platform}: {followers:,} followers")
+            # PLATFORMS is already in display order, no per-date sort needed
+            for platform in PLATFORMS:
+                if platform in platforms:
+                    print(f"    {platform}: {platforms[platform]:,} followers")
         
         # Display growth if we have multiple dates
         if len(sorted_dates) > 1:
             print("\nGrowth Analysis:")
-            first_date = sorted_dates[0]
-            last_date = sorted_dates[-1]
-            
             for platform in ['douyin', 'bilibili', 'xiaohongshu']:
-                if platform in history[first_date] and platform in history[last_date]:
-                    first_count = history[first_date][platform]
-                    last_count = history[last_date][platform]
+                series = per_platform[platform]
+                if len(series) > 1:
+                    first_count = series[0][1]
+                    last_count = series[-1][1]
                     growth = last_count - first_count
                     growth_pct = (growth / first_count * 100) if first_count > 0 else 0
                     print(f"  {platform}: {first_count:,} → {last_count:,} ({growth:+,}, {growth_pct:+.2f}%)")
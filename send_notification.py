@@ -12,27 +12,21 @@ from email.mime.multipart import MIMEMultipart
 from email.header import Header
 
 
-def send_email(sender_email, sender_password, receiver_email, subject, body, port=465):
+def send_emails(sender_email, sender_password, messages, port=465):
     """
-    Send email using QQ SMTP server with SSL
+    Send several emails over a single QQ SMTP connection
+    
+    Connects and logs in once, then sends every message, avoiding a TLS
+    handshake and AUTH round-trip per email.
     
     Args:
         sender_email: Sender's QQ email address
         sender_password: QQ email authorization code
-        receiver_email: Receiver's email address
-        subject: Email subject
-        body: Email body content
+        messages: List of (receiver_email, subject, body) tuples
         port: SMTP port (465 or 587), default is 465
     """
     try:
-        # Create message
-        message = MIMEMultipart()
-        message['From'] = Header(sender_email)
-        message['To'] = Header(receiver_email)
-        message['Subject'] = Header(subject, 'utf-8')
-        message.attach(MIMEText(body, 'plain', 'utf-8'))
-        
-        # Connect and send
+        # Connect once
         if port == 465:
             server = smtplib.SMTP_SSL('smtp.qq.com', port)
         else:
@@ -40,10 +34,19 @@ def send_email(sender_email, sender_password, receiver_email, subject, body, por
             server.starttls()
         
         server.login(sender_email, sender_password)
-        server.sendmail(sender_email, [receiver_email], message.as_string())
-        server.quit()
         
-        print(f"Email sent successfully to {receiver_email}")
+        for receiver_email, subject, body in messages:
+            # Create message
+            message = MIMEMultipart()
+            message['From'] = Header(sender_email)
+            message['To'] = Header(receiver_email)
+            message['Subject'] = Header(subject, 'utf-8')
+            message.attach(MIMEText(body, 'plain', 'utf-8'))
+            
+            server.sendmail(sender_email, [receiver_email], message.as_string())
+            print(f"Email sent successfully to {receiver_email}")
+        
+        server.quit()
         return True
         
     except Exception as e:
@@ -51,6 +54,21 @@ def send_email(sender_email, sender_password, receiver_email, subject, body, por
         return False
 
 
+def send_email(sender_email, sender_password, receiver_email, subject, body, port=465):
+    """
+    Send email using QQ SMTP server with SSL
+    
+    Args:
+        sender_email: Sender's QQ email address
+        sender_password: QQ email authorization code
+        receiver_email: Receiver's email address
+        subject: Email subject
+        body: Email body content
+        port: SMTP port (465 or 587), default is 465
+    """
+    return send_emails(sender_email, sender_password, [(receiver_email, subject, body)], port=port)
+
+
 if __name__ == "__main__":
     # Get credentials from environment variables
     MAILTO = os.getenv('MAILTO')
@@ -3,22 +3,29 @@
 支持抖音、小红书、B站三个平台
 
 安装依赖:
-pip install playwright
+pip install playwright zstandard
 playwright install chromium
 
 功能:
 1. 使用Playwright直接访问网页获取数据
-2. 支持Cookie保存和管理
+2. 使用持久化浏览器配置（cookies/profile）保存登录状态
 3. 小红书需要登录，抖音和B站不需要
-4. 保存HTML用于后续数据提取
+4. 保存HTML（zstd压缩）用于后续数据提取
 """
 
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import asyncio
 import json
 from datetime import datetime
-import time
 import os
 from pathlib import Path
+import zstandard as zstd
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# 数据模式下只需要HTML，这些资源直接拦截以减少加载量
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet'}
+
 
 class SimpleSocialMediaMonitor:
     """简单的社交媒体数据监控器"""
@@ -27,245 +34,124 @@ class SimpleSocialMediaMonitor:
         """
         初始化监控器
         mode: 'login' 或 'get_data'
-            - 'login': 手动登录模式，用于更新cookies
-            - 'get_data': 数据获取模式（默认），使用已保存的cookies
+            - 'login': 手动登录模式，用于更新登录状态
+            - 'get_data': 数据获取模式（默认），使用已保存的登录状态
         """
         self.mode = mode
         self.data = {}
         self.cookies_dir = Path('cookies')
+        self.profile_dir = self.cookies_dir / 'profile'
         self.html_dir = Path('html_cache')
         
         # 创建必要的目录
         self.cookies_dir.mkdir(exist_ok=True)
         self.html_dir.mkdir(exist_ok=True)
     
-    def _save_cookies(self, context, platform):
-        """保存cookies到文件"""
-        cookies = context.cookies()
-        cookie_file = self.cookies_dir / f'{platform}_cookies.json'
-        with open(cookie_file, 'w', encoding='utf-8') as f:
-            json.dump(cookies, f, ensure_ascii=False, indent=2)
-        print(f"✓ {platform} cookies已保存到: {cookie_file}")
-    
-    def _load_cookies(self, platform):
-        """从文件加载cookies"""
-        cookie_file = self.cookies_dir / f'{platform}_cookies.json'
-        if cookie_file.exists():
-            with open(cookie_file, 'r', encoding='utf-8') as f:
-                cookies = json.load(f)
-            print(f"✓ 已加载 {platform} cookies")
-            return cookies
-        else:
-            print(f"⚠️  未找到 {platform} cookies文件")
-            return None
-    
     def _save_html(self, content, platform, timestamp=None):
-        """保存HTML内容到文件"""
+        """保存HTML内容到文件（zstd压缩）"""
         if timestamp is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        html_file = self.html_dir / f'{platform}_{timestamp}.html'
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        html_file = self.html_dir / f'{platform}_{timestamp}.html.zst'
+        with open(html_file, 'wb') as f:
+            f.write(zstd.ZstdCompressor(level=9).compress(content.encode('utf-8')))
         print(f"✓ HTML已保存到: {html_file}")
         return html_file
     
-    def get_douyin_stats(self, user_url):
+    async def _block_heavy_resources(self, route):
+        """拦截图片、视频、字体和样式表请求"""
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def _get_stats(self, context, platform, name, user_url, login_prompt, wait_selector, **goto_kwargs):
         """
-        获取抖音用户公开数据
-        user_url: 抖音用户主页链接
+        在共享的持久化浏览器context中获取单个平台数据
+        每个平台使用单独的页面，登录状态由浏览器配置目录保存
         """
-        platform = 'douyin'
         print(f"\n{'='*50}")
-        print(f"正在获取抖音数据: {user_url}")
+        print(f"正在获取{name}数据: {user_url}")
         print(f"{'='*50}")
         
-        with sync_playwright() as p:
-            # 启动浏览器
-            headless = (self.mode == 'get_data')
-            browser = p.chromium.launch(headless=headless)
-            context = browser.new_context(
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            # 加载cookies（如果存在）
-            cookies = self._load_cookies(platform)
-            if cookies:
-                context.add_cookies(cookies)
-            
-            page = context.new_page()
-            
-            try:
-                if self.mode == 'login':
-                    print("\n" + "="*50)
-                    print("  登录模式 - 请在浏览器中手动登录")
-                    print("  登录完成后，按回车键继续...")
-                    print("="*50 + "\n")
-                    
-                    page.goto(user_url)
-                    input("按回车键继续...")
-                    
-                    # 保存cookies
-                    self._save_cookies(context, platform)
-                    print("✓ 抖音登录完成，cookies已保存")
-                    
-                else:  # get_data mode
-                    # 访问用户主页
-                    page.goto(user_url, wait_until='domcontentloaded', timeout=60000)
-                    time.sleep(3)  # 等待页面完全加载
-                    
-                    # 保存HTML
-                    html_content = page.content()
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    self._save_html(html_content, platform, timestamp)
-                    
-                    # 返回基本信息（HTML已保存，等待后续regex提取）
-                    stats = {
-                        'url': user_url,
-                        'timestamp': timestamp,
-                        'html_saved': True,
-                        'message': 'HTML已保存，等待数据提取'
-                    }
-                    
-                    print(f"✓ 抖音数据获取成功")
-                    return stats
+        page = await context.new_page()
+        
+        try:
+            if self.mode == 'login':
+                print("\n" + "="*50)
+                print(f"  登录模式 - {login_prompt}")
+                print("  登录完成后，按回车键继续...")
+                print("="*50 + "\n")
                 
-            except Exception as e:
-                print(f"✗ 抖音数据获取失败: {str(e)}")
-                return {'error': str(e)}
-            finally:
-                browser.close()
+                await page.goto(user_url)
+                input("按回车键继续...")
+                
+                # 登录状态由持久化浏览器配置自动保存
+                print(f"✓ {name}登录完成，登录状态已保存")
+                
+            else:  # get_data mode
+                # 访问用户主页
+                await page.goto(user_url, **goto_kwargs)
+                # 等待粉丝数元素出现，而不是固定等待
+                try:
+                    await page.wait_for_selector(wait_selector, state='attached', timeout=15000)
+                except PlaywrightTimeoutError:
+                    # 仍然保存HTML（登录失效、页面改版等），让extract_append.py提取失败并报错
+                    print(f"⚠️  {name}页面未出现粉丝数元素 ({wait_selector})，仍保存HTML")
+                
+                # 保存HTML
+                html_content = await page.content()
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                self._save_html(html_content, platform, timestamp)
+                
+                # 返回基本信息（HTML已保存，等待后续regex提取）
+                stats = {
+                    'url': user_url,
+                    'timestamp': timestamp,
+                    'html_saved': True,
+                    'message': 'HTML已保存，等待数据提取'
+                }
+                
+                print(f"✓ {name}数据获取成功")
+                return stats
+            
+        except Exception as e:
+            print(f"✗ {name}数据获取失败: {str(e)}")
+            return {'error': str(e)}
+        finally:
+            await page.close()
     
-    def get_xiaohongshu_stats(self, user_url):
+    async def get_douyin_stats(self, context, user_url):
+        """
+        获取抖音用户公开数据
+        context: 共享的持久化浏览器context
+        user_url: 抖音用户主页链接
+        """
+        return await self._get_stats(context, 'douyin', '抖音', user_url,
+                                     login_prompt='请在浏览器中手动登录',
+                                     wait_selector='[data-e2e="user-info-fans"]',
+                                     wait_until='domcontentloaded', timeout=60000)
+    
+    async def get_xiaohongshu_stats(self, context, user_url):
         """
         获取小红书用户公开数据（需要登录）
+        context: 共享的持久化浏览器context
         user_url: 小红书用户主页链接
         """
-        platform = 'xiaohongshu'
-        print(f"\n{'='*50}")
-        print(f"正在获取小红书数据: {user_url}")
-        print(f"{'='*50}")
-        
-        with sync_playwright() as p:
-            # 启动浏览器
-            headless = (self.mode == 'get_data')
-            browser = p.chromium.launch(headless=headless)
-            context = browser.new_context(
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            # 加载cookies（如果存在）
-            cookies = self._load_cookies(platform)
-            if cookies:
-                context.add_cookies(cookies)
-            
-            page = context.new_page()
-            
-            try:
-                if self.mode == 'login':
-                    print("\n" + "="*50)
-                    print("  登录模式 - 请在浏览器中手动登录小红书")
-                    print("  登录完成后，按回车键继续...")
-                    print("="*50 + "\n")
-                    
-                    page.goto(user_url)
-                    input("按回车键继续...")
-                    
-                    # 保存cookies
-                    self._save_cookies(context, platform)
-                    print("✓ 小红书登录完成，cookies已保存")
-                    
-                else:  # get_data mode
-                    # 访问用户主页
-                    page.goto(user_url, wait_until='networkidle')
-                    time.sleep(3)  # 等待页面完全加载
-                    
-                    # 保存HTML
-                    html_content = page.content()
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    self._save_html(html_content, platform, timestamp)
-                    
-                    # 返回基本信息（HTML已保存，等待后续regex提取）
-                    stats = {
-                        'url': user_url,
-                        'timestamp': timestamp,
-                        'html_saved': True,
-                        'message': 'HTML已保存，等待数据提取'
-                    }
-                    
-                    print(f"✓ 小红书数据获取成功")
-                    return stats
-                
-            except Exception as e:
-                print(f"✗ 小红书数据获取失败: {str(e)}")
-                return {'error': str(e)}
-            finally:
-                browser.close()
+        return await self._get_stats(context, 'xiaohongshu', '小红书', user_url,
+                                     login_prompt='请在浏览器中手动登录小红书',
+                                     wait_selector='.count',
+                                     wait_until='networkidle')
     
-    def get_bilibili_stats(self, user_url):
+    async def get_bilibili_stats(self, context, user_url):
         """
         获取B站用户公开数据
+        context: 共享的持久化浏览器context
         user_url: B站用户空间链接，例如: https://space.bilibili.com/uid
         """
-        platform = 'bilibili'
-        print(f"\n{'='*50}")
-        print(f"正在获取B站数据: {user_url}")
-        print(f"{'='*50}")
-        
-        with sync_playwright() as p:
-            # 启动浏览器
-            headless = (self.mode == 'get_data')
-            browser = p.chromium.launch(headless=headless)
-            context = browser.new_context(
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            # 加载cookies（如果存在）
-            cookies = self._load_cookies(platform)
-            if cookies:
-                context.add_cookies(cookies)
-            
-            page = context.new_page()
-            
-            try:
-                if self.mode == 'login':
-                    print("\n" + "="*50)
-                    print("  登录模式 - 请在浏览器中手动登录B站（可选）")
-                    print("  登录完成后，按回车键继续...")
-                    print("="*50 + "\n")
-                    
-                    page.goto(user_url)
-                    input("按回车键继续...")
-                    
-                    # 保存cookies
-                    self._save_cookies(context, platform)
-                    print("✓ B站登录完成，cookies已保存")
-                    
-                else:  # get_data mode
-                    # 访问用户空间
-                    page.goto(user_url, wait_until='networkidle')
-                    time.sleep(3)  # 等待页面完全加载
-                    
-                    # 保存HTML
-                    html_content = page.content()
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    self._save_html(html_content, platform, timestamp)
-                    
-                    # 返回基本信息（HTML已保存，等待后续regex提取）
-                    stats = {
-                        'url': user_url,
-                        'timestamp': timestamp,
-                        'html_saved': True,
-                        'message': 'HTML已保存，等待数据提取'
-                    }
-                    
-                    print(f"✓ B站数据获取成功")
-                    return stats
-                
-            except Exception as e:
-                print(f"✗ B站数据获取失败: {str(e)}")
-                return {'error': str(e)}
-            finally:
-                browser.close()
+        return await self._get_stats(context, 'bilibili', 'B站', user_url,
+                                     login_prompt='请在浏览器中手动登录B站（可选）',
+                                     wait_selector='.nav-statistics__item-num',
+                                     wait_until='networkidle')
     
     def monitor_all(self, config):
         """
@@ -277,26 +163,56 @@ class SimpleSocialMediaMonitor:
         print(f"  模式: {self.mode}")
         print("="*50 + "\n")
         
-        # 抖音
-        if 'douyin_url' in config:
-            self.data['douyin'] = self.get_douyin_stats(config['douyin_url'])
-        
-        # 小红书
-        if 'xiaohongshu_url' in config:
-            self.data['xiaohongshu'] = self.get_xiaohongshu_stats(config['xiaohongshu_url'])
-        
-        # B站
-        if 'bilibili_url' in config:
-            self.data['bilibili'] = self.get_bilibili_stats(config['bilibili_url'])
+        asyncio.run(self._monitor_all(config))
         
         print("\n" + "="*50)
         if self.mode == 'login':
-            print("  登录完成! Cookies已保存")
+            print("  登录完成! 登录状态已保存")
         else:
             print("  数据获取完成! HTML已保存")
         print("="*50 + "\n")
         
         return self.data
+    
+    async def _monitor_all(self, config):
+        """在共享浏览器中获取所有平台数据，数据模式下三个平台并发执行"""
+        async with async_playwright() as p:
+            # 启动持久化浏览器（所有平台共用，cookies和localStorage跨次运行保留）
+            # 注意: 数据模式下启用了请求拦截，Playwright会因此禁用HTTP缓存，配置目录只用于保存登录状态
+            headless = (self.mode == 'get_data')
+            context = await p.chromium.launch_persistent_context(
+                user_data_dir=str(self.profile_dir),
+                headless=headless,
+                user_agent=USER_AGENT
+            )
+            
+            # 数据模式不需要渲染页面，拦截无关资源（登录模式保留完整页面）
+            if self.mode == 'get_data':
+                await context.route('**/*', self._block_heavy_resources)
+            
+            try:
+                tasks = {}
+                # 抖音
+                if 'douyin_url' in config:
+                    tasks['douyin'] = self.get_douyin_stats(context, config['douyin_url'])
+                
+                # 小红书
+                if 'xiaohongshu_url' in config:
+                    tasks['xiaohongshu'] = self.get_xiaohongshu_stats(context, config['xiaohongshu_url'])
+                
+                # B站
+                if 'bilibili_url' in config:
+                    tasks['bilibili'] = self.get_bilibili_stats(context, config['bilibili_url'])
+                
+                if self.mode == 'login':
+                    # 登录模式需要逐个等待手动输入，只能顺序执行
+                    for platform, task in tasks.items():
+                        self.data[platform] = await task
+                else:
+                    results = await asyncio.gather(*tasks.values())
+                    self.data.update(zip(tasks.keys(), results))
+            finally:
+                await context.close()
 
 
 # ============ 使用示例 ============
@@ -339,7 +255,7 @@ if __name__ == '__main__':
         else:
             print("使用方法:")
             print("  python simple_monitor.py          # 获取数据（默认）")
-            print("  python simple_monitor.py login    # 登录模式，更新cookies")
+            print("  python simple_monitor.py login    # 登录模式，更新登录状态")
             print("  python simple_monitor.py get_data # 获取数据模式")
             sys.exit(1)
     
@@ -359,7 +275,7 @@ if __name__ == '__main__':
 使用说明:
 
 1. 安装依赖:
-   pip install playwright
+   pip install playwright zstandard
    playwright install chromium
 
 2. 设置环境变量:
@@ -373,25 +289,23 @@ if __name__ == '__main__':
    python simple_monitor.py login
    
    这会打开浏览器窗口，请手动登录小红书
-   登录完成后按回车，cookies会自动保存
+   登录完成后按回车，登录状态会自动保存到浏览器配置目录
 
 4. 获取数据:
    python simple_monitor.py get_data
    或
    python simple_monitor.py
    
-   这会使用保存的cookies访问各平台，并保存HTML到 html_cache/ 目录
+   这会使用保存的登录状态访问各平台，并保存HTML到 html_cache/ 目录
 
 5. 文件结构:
-   cookies/              # 保存的cookies
-   ├── douyin_cookies.json
-   ├── xiaohongshu_cookies.json
-   └── bilibili_cookies.json
+   cookies/              # 浏览器数据
+   └── profile/          # 持久化浏览器配置（cookies、localStorage）
    
-   html_cache/           # 保存的HTML文件
-   ├── douyin_20241112_143022.html
-   ├── xiaohongshu_20241112_143025.html
-   └── bilibili_20241112_143028.html
+   html_cache/           # 保存的HTML文件（zstd压缩）
+   ├── douyin_20241112_143022.html.zst
+   ├── xiaohongshu_20241112_143025.html.zst
+   └── bilibili_20241112_143028.html.zst
    
    social_media_stats.json  # 汇总的统计数据
 